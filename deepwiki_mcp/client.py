@@ -0,0 +1,671 @@
+"""
+HTTP client for the DeepWiki API, shared by the MCP tool and the FastAPI
+endpoints in main.py. Single home for connection pooling, caching and
+resilience so every transport goes through the same tuned path.
+"""
+
+import asyncio
+import codecs
+import gzip
+import hashlib
+import logging
+import operator
+import os
+import re
+import socket
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Any
+
+import httpx
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+# Constants
+# Try to resolve the deepwiki hostname
+try:
+    # Try to resolve the Docker hostname
+    socket.gethostbyname('deepwiki')
+    DEEPWIKI_API_HOST = os.environ.get("DEEPWIKI_API_HOST", "http://deepwiki:9781")
+    logger.info(f"Using Docker hostname: {DEEPWIKI_API_HOST}")
+except socket.gaierror:
+    # Fall back to localhost if hostname resolution fails
+    DEEPWIKI_API_HOST = os.environ.get("DEEPWIKI_API_HOST", "http://localhost:9781")
+    logger.info(f"Using localhost: {DEEPWIKI_API_HOST}")
+
+# Defaults applied when a caller does not pick a provider/model explicitly.
+DEFAULT_PROVIDER = "google"
+DEFAULT_MODEL = "gemini-2.5-pro-preview-05-06"
+
+# HTTP client tuning for the upstream DeepWiki API.
+# The timeout is split into components so a long streaming read (the LLM can
+# generate for minutes) is not bounded by the same value as connect or pool
+# acquisition. The pool is sized well above expected concurrency and keeps
+# connections warm so steady traffic skips the TCP+TLS handshake entirely.
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=300.0, write=10.0, pool=2.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=1024,
+    max_keepalive_connections=100,
+    keepalive_expiry=30.0,
+)
+
+# Shared headers for JSON POSTs, built once instead of per request.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Matches both full GitHub URLs and bare owner/repo identifiers.
+_GITHUB_REPO_RE = re.compile(
+    r"(?:github\.com[/:])?([\w.-]+)/([\w.-]+?)(?:\.git)?/?$")
+
+# How long a resolved HEAD sha is trusted before re-asking GitHub.
+_HEAD_SHA_TTL = 300.0
+
+# How long a health-check result is served from cache before re-probing.
+_HEALTH_CHECK_TTL = 5.0
+
+
+class ChatMessage(BaseModel):
+    """Model for a chat message."""
+    role: str = Field(..., description="Role of the message sender, either 'user' or 'assistant'")
+    content: str = Field(..., description="Content of the message")
+
+
+# Dumps conversation history through pydantic-core's Rust path; much
+# cheaper than a Python-level attribute walk for long histories.
+_MSG_ADAPTER = TypeAdapter(List[ChatMessage])
+
+
+class SSEParser:
+    """Incremental parser for SSE-framed byte streams.
+
+    feed() consumes raw bytes exactly as they arrive off the wire and
+    yields the payload of each ``data:`` line once its event terminator
+    has been seen, so callers only ever JSON-parse known-complete payloads
+    regardless of how the network split the stream.
+    """
+
+    __slots__ = ("_buffer",)
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Consume raw bytes and yield complete event payloads."""
+        self._buffer.extend(data)
+        while True:
+            # The spec allows LF or CRLF line endings, and reverse proxies
+            # do re-frame with CRLF; take whichever terminator comes first.
+            lf = self._buffer.find(b"\n\n")
+            crlf = self._buffer.find(b"\r\n\r\n")
+            if crlf != -1 and (lf == -1 or crlf < lf):
+                end, skip = crlf, 4
+            elif lf != -1:
+                end, skip = lf, 2
+            else:
+                break
+            event = bytes(self._buffer[:end])
+            del self._buffer[:end + skip]
+            for line in event.split(b"\n"):
+                if not line.startswith(b"data:"):
+                    continue
+                # strip() also drops the \r a CRLF line leaves behind.
+                payload = line[5:].strip()
+                if payload:
+                    yield payload
+
+
+class CircuitBreakerOpenError(RuntimeError):
+    """Raised when a call is short-circuited because the breaker is open."""
+
+
+class CircuitBreaker:
+    """Fail fast once the upstream has failed several calls in a row.
+
+    Closed by default; `failure_threshold` consecutive failures open the
+    breaker, and while it is open every call raises immediately instead of
+    tying up a coroutine (and a pool slot) for the full timeout. After
+    `reset_timeout` seconds one trial request is admitted (half-open):
+    success closes the breaker, failure re-opens the window.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+        self._half_open = False
+
+    def check(self) -> None:
+        """Raise CircuitBreakerOpenError if calls should be short-circuited."""
+        if self.opened_at is None:
+            return
+        if not self._half_open and time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Admit exactly one trial request.
+            self._half_open = True
+            return
+        raise CircuitBreakerOpenError(
+            "DeepWiki API circuit breaker is open; upstream marked unavailable")
+
+    def record_success(self) -> None:
+        self.failure_count = 0
+        self.opened_at = None
+        self._half_open = False
+
+    def record_failure(self) -> None:
+        if self._half_open:
+            # The trial request failed; start a fresh open window.
+            self.opened_at = time.monotonic()
+            self._half_open = False
+            return
+        self.failure_count += 1
+        if self.failure_count >= self.failure_threshold:
+            logger.warning("Circuit breaker opened after %d consecutive failures",
+                           self.failure_count)
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """Revert a half-open admission when the trial ended without a verdict.
+
+        A trial that is abandoned (caller closed the stream early, task
+        cancelled) says nothing about upstream health. Without this the
+        breaker would stay half-open forever and short-circuit every later
+        call; reverting lets the next call be admitted as a fresh trial.
+        """
+        self._half_open = False
+
+
+class QueryCache:
+    """In-memory cache of answers for repeated queries.
+
+    Identical questions against the same repository ("what is this repo
+    about?") otherwise pay full LLM latency every time. This is the
+    exact-match v1 of a semantic cache: entries are keyed by the full
+    request shape with a whitespace/case-normalized query and expire after
+    a TTL. Similarity-based lookup can layer on top later without changing
+    the call sites.
+
+    Set DEEPWIKI_CACHE_TTL=0 to disable caching entirely.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 256):
+        if ttl is None:
+            ttl = float(os.environ.get("DEEPWIKI_CACHE_TTL", "3600"))
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Collapse whitespace and case so trivial rephrasings still hit."""
+        return " ".join(query.split()).lower()
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached answer for key, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        timestamp, answer = entry
+        if time.monotonic() - timestamp > self.ttl:
+            del self._entries[key]
+            return None
+        return answer
+
+    def put(self, key: tuple, answer: str) -> None:
+        """Store an answer, evicting the oldest entry once full."""
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+        self._entries[key] = (time.monotonic(), answer)
+
+
+class DiskQueryCache:
+    """On-disk cache of answers, keyed by repository commit SHA when known.
+
+    Answers to repository-level questions are stable for the lifetime of a
+    commit, so entries keyed by (repository, HEAD sha, query, ...) survive
+    process restarts and stay valid until the repository moves. When the
+    HEAD sha could not be resolved the entry falls back to the same TTL as
+    the in-memory cache, judged from the file's mtime. Entries are stored
+    as gzip-compressed JSON under DEEPWIKI_CACHE_DIR; set it to an empty
+    string to disable the disk tier.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                "DEEPWIKI_CACHE_DIR", os.path.join("~", ".cache", "deepwiki-mcp"))
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else ""
+        # In-flight write-behind tasks; referenced here so they are not
+        # garbage-collected before completing.
+        self._writes: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+
+    def _path(self, key: tuple) -> str:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json.gz")
+
+    async def get(self, key: tuple, ttl: float) -> Optional[str]:
+        """Return the cached answer for key, or None if absent or stale.
+
+        Keys that include a commit sha never expire (a new sha produces a
+        new key); sha-less keys expire after ttl seconds. The read (and
+        gzip decompression) runs in a worker thread so a multi-megabyte
+        entry never stalls the event loop.
+        """
+        return await asyncio.to_thread(self._read, key, ttl)
+
+    def _read(self, key: tuple, ttl: float) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if key[-1] is None and time.time() - os.path.getmtime(path) > ttl:
+                os.unlink(path)
+                return None
+            with gzip.open(path, "rb") as f:
+                return orjson.loads(f.read())["answer"]
+        except (OSError, orjson.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key: tuple, answer: str) -> None:
+        """Store an answer, write-behind; failures are logged and ignored.
+
+        gzip compression plus the file write would block every concurrent
+        stream if run on the loop, so the work is handed to a worker
+        thread and the caller returns immediately.
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(self._write, key, answer))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _write(self, key: tuple, answer: str) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with gzip.open(self._path(key), "wb") as f:
+                f.write(orjson.dumps({"answer": answer, "created": time.time()}))
+        except OSError as e:
+            logger.warning(f"Could not write disk cache entry: {e}")
+
+
+# Known delta shapes across providers. The shape is constant within one
+# stream, so stream_query binds the matching extractor on the first event
+# and calls it monomorphically for the rest instead of probing every key
+# on every delta.
+_DELTA_EXTRACTORS = (
+    operator.itemgetter('text'),
+    operator.itemgetter('content'),
+    lambda parsed: parsed['delta']['content'],
+)
+
+
+def _bind_delta_extractor(parsed: Dict[str, Any]):
+    """Return (extractor, delta) for the first shape matching this event."""
+    for extract in _DELTA_EXTRACTORS:
+        try:
+            return extract, extract(parsed)
+        except (KeyError, TypeError):
+            continue
+    return None, str(parsed)
+
+
+# Prefix the DeepWiki API recognizes as a deep-research instruction.
+_DEEP_RESEARCH_PREFIX = "[DEEP RESEARCH] "
+
+
+def _format_plain(query: str) -> str:
+    return query
+
+
+def _format_deep(query: str) -> str:
+    return _DEEP_RESEARCH_PREFIX + query
+
+
+# Indexed by bool(deep_research), so query() picks a formatter by table
+# lookup instead of branching and re-interpolating an f-string per call.
+_USER_MESSAGE_FORMATTERS = (_format_plain, _format_deep)
+
+
+class DeepWikiClient:
+    """Client for communicating with the DeepWiki API."""
+
+    def __init__(
+            self,
+            base_url: str = DEEPWIKI_API_HOST,
+            timeout: Optional[httpx.Timeout] = None,
+            limits: Optional[httpx.Limits] = None,
+    ):
+        """Initialize the client with the DeepWiki API host."""
+        self.base_url = base_url
+        limits = limits or DEFAULT_LIMITS
+        self.http_client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout or DEFAULT_TIMEOUT,
+            limits=limits,
+            http2=True,
+            # LLM answers are highly compressible text; httpx decompresses
+            # transparently and incrementally, so streamed TTFB is kept.
+            headers={"Accept-Encoding": "gzip, br"},
+        )
+        # Admission control (bulkhead): bound concurrent upstream requests
+        # well below pool capacity by default, so a burst of MCP clients
+        # queues here instead of opening hundreds of sockets against a
+        # single model server — and never piles into httpx's short
+        # pool-acquisition wait. The pool size stays the hard upper bound.
+        max_concurrency = int(os.environ.get("DEEPWIKI_MAX_CONCURRENCY", "32"))
+        self._inflight = asyncio.Semaphore(
+            min(max_concurrency, limits.max_connections or max_concurrency))
+        self.cache = QueryCache()
+        self.disk_cache = DiskQueryCache()
+        self._head_shas: Dict[str, tuple] = {}
+        self._last_health: Optional[tuple] = None
+        self._breaker = CircuitBreaker()
+
+    async def close(self):
+        """Close the HTTP client."""
+        await self.http_client.aclose()
+
+    async def health_check(self, force: bool = False) -> bool:
+        """Check if the DeepWiki API is available.
+
+        The result is cached briefly so frequent probes (the /health
+        endpoint, client-side liveness polling) don't each pay an upstream
+        round-trip; pass force=True to probe unconditionally, as the
+        startup warmup does.
+        """
+        if not force and self._last_health is not None:
+            checked_at, healthy = self._last_health
+            if time.monotonic() - checked_at < _HEALTH_CHECK_TTL:
+                return healthy
+
+        healthy = False
+        try:
+            response = await self.http_client.get("/")
+            if response.status_code == 200:
+                healthy = True
+            else:
+                logger.warning(f"DeepWiki API health check failed with status {response.status_code}")
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            logger.error("Error connecting to DeepWiki API: %r", e)
+
+        self._last_health = (time.monotonic(), healthy)
+        return healthy
+
+    async def _resolve_head_sha(self, repository: str, repo_type: str) -> Optional[str]:
+        """Best-effort lookup of the repository's current HEAD commit sha.
+
+        Results (including failures) are memoized for a few minutes so the
+        GitHub API is not hit on every query. Returns None when the sha
+        cannot be determined.
+        """
+        if repo_type != "github":
+            return None
+        cached = self._head_shas.get(repository)
+        if cached is not None and time.monotonic() - cached[0] < _HEAD_SHA_TTL:
+            return cached[1]
+
+        sha = None
+        match = _GITHUB_REPO_RE.search(repository)
+        if match:
+            owner, repo = match.groups()
+            try:
+                response = await self.http_client.get(
+                    f"https://api.github.com/repos/{owner}/{repo}/commits/HEAD",
+                    headers={"Accept": "application/vnd.github+json"},
+                    timeout=5.0,
+                )
+                if response.status_code == 200:
+                    sha = response.json().get("sha")
+            except httpx.HTTPError as e:
+                logger.debug("Could not resolve HEAD sha for %s: %r", repository, e)
+
+        self._head_shas[repository] = (time.monotonic(), sha)
+        return sha
+
+    @staticmethod
+    def build_api_request(
+            *,
+            repository: str,
+            query: str,
+            repo_type: str = "github",
+            language: str = "en",
+            deep_research: bool = False,
+            model: Optional[str] = None,
+            provider: Optional[str] = None,
+            history: Optional[List[ChatMessage]] = None,
+    ) -> Dict[str, Any]:
+        """Build the /chat/completions/stream payload.
+
+        Single source of truth for the upstream request shape; the MCP
+        tool, HTTP endpoints and WebSocket handler all go through here.
+        Previous conversation messages, when given, precede the current
+        user message.
+        """
+        user_message = {
+            "role": "user",
+            "content": _USER_MESSAGE_FORMATTERS[deep_research](query)
+        }
+        if history:
+            messages = _MSG_ADAPTER.dump_python(history)
+            messages.append(user_message)
+        else:
+            # Common case: a fresh, single-message conversation.
+            messages = [user_message]
+
+        return {
+            "repo_url": repository,
+            "type": repo_type,
+            "language": language,
+            "messages": messages,  # This is explicitly List[Dict[str, str]]
+            "model": model or DEFAULT_MODEL,
+            "provider": provider or DEFAULT_PROVIDER
+        }
+
+    async def query(
+            self,
+            *,
+            repository: str,
+            query: str,
+            repo_type: str = "github",
+            language: str = "en",
+            deep_research: bool = False,
+            model: Optional[str] = None,
+            provider: Optional[str] = None,
+            no_cache: bool = False,
+            history: Optional[List[ChatMessage]] = None,
+    ) -> str:
+        """
+        Query the DeepWiki API for an answer.
+
+        Args:
+            repository: Repository URL or identifier
+            query: Query text
+            repo_type: Repository type (github, gitlab, etc.)
+            language: Language for the response
+            deep_research: Whether to conduct a deep research or not
+            model: Model to use with the provider; provider default if None
+            provider: Model provider to use; system default if None
+            no_cache: Bypass the query cache for this call
+            history: Previous messages in the conversation, if any
+
+        Returns:
+            String containing DeepWiki's answer
+        """
+        model = model or DEFAULT_MODEL
+        provider = provider or DEFAULT_PROVIDER
+
+        # Deep-research runs are deliberately never cached (they are
+        # expected to dig further than a previous answer to the same
+        # question), and multi-turn answers depend on their history.
+        cache_key = None
+        disk_key = None
+        if not no_cache and not deep_research and not history and self.cache.ttl > 0:
+            cache_key = (repository, repo_type, language,
+                         QueryCache.normalize(query), model, provider)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Query cache hit for repository: {repository}")
+                return cached
+            if self.disk_cache.enabled:
+                head_sha = await self._resolve_head_sha(repository, repo_type)
+                disk_key = cache_key + (head_sha,)
+                cached = await self.disk_cache.get(disk_key, self.cache.ttl)
+                if cached is not None:
+                    logger.info(f"Disk cache hit for repository: {repository}")
+                    self.cache.put(cache_key, cached)
+                    return cached
+
+        # Build the payload from plain values; validation already happened at
+        # the edge (MCP argument parsing or the FastAPI request schema), so a
+        # Pydantic round-trip here would be pure overhead.
+        api_request = self.build_api_request(
+            repository=repository,
+            query=query,
+            repo_type=repo_type,
+            language=language,
+            deep_research=deep_research,
+            model=model,
+            provider=provider,
+            history=history,
+        )
+
+        # %-formatting defers string construction to the logging framework,
+        # so nothing is built here unless DEBUG is actually enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("DeepWikiClient: api_request keys=%s", list(api_request))
+
+        # Make the API request; failures propagate so the MCP framework and
+        # FastAPI's exception handlers can report a real error the caller
+        # may retry, instead of a string that looks like an answer.
+        response = await self._stream_query(api_request)
+
+        if cache_key is not None and response:
+            self.cache.put(cache_key, response)
+            if disk_key is not None:
+                self.disk_cache.put(disk_key, response)
+        return response
+
+    async def stream_query(self, api_request: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream text deltas from the DeepWiki API as they arrive.
+
+        Yields each delta as soon as it is parsed, so consumers that can
+        stream (HTTP/WebSocket handlers) start forwarding after the first
+        token instead of waiting for the full generation.
+        """
+        api_url = "/chat/completions/stream"
+        # Serialize once up front: passing json= would make httpx re-run
+        # stdlib json.dumps per request, while orjson emits the bytes body
+        # directly.
+        body = orjson.dumps(api_request)
+
+        self._breaker.check()
+        # Track whether the breaker saw an outcome: a consumer may abandon
+        # this generator mid-stream (client disconnect, cancellation), in
+        # which case neither success nor failure runs and a half-open
+        # admission must be reverted or the breaker latches open forever.
+        settled = False
+        try:
+            async for piece in self._stream_upstream(api_url, body):
+                yield piece
+            self._breaker.record_success()
+            settled = True
+        except (httpx.HTTPError, asyncio.TimeoutError):
+            self._breaker.record_failure()
+            settled = True
+            raise
+        finally:
+            if not settled:
+                self._breaker.record_abandoned()
+
+    async def _stream_upstream(self, api_url: str, body: bytes) -> AsyncIterator[str]:
+        """Issue the upstream streaming request and yield parsed deltas."""
+        async with self._inflight, self.http_client.stream("POST", api_url, content=body, headers=_JSON_HEADERS) as response:
+            # A non-2xx body (FastAPI's {"detail": ...} for 400/500) must
+            # not be streamed out as if it were an answer: raise so it hits
+            # the 502 handler, the breaker's failure accounting and the
+            # cache guard instead of being served and cached as a result.
+            response.raise_for_status()
+            # The DeepWiki API streams plain text chunks, but some
+            # deployments front it with SSE framing (`data: {...}` events).
+            # httpx chunk boundaries are arbitrary, so sniff the framing once
+            # from the first chunk and in SSE mode only parse complete events.
+            #
+            # Everything runs on bytes: orjson accepts bytes payloads
+            # directly, and plain text goes through a single incremental
+            # UTF-8 decoder instead of the str round-trip aiter_text would
+            # do per chunk (a chunk can also split a multibyte character,
+            # which the incremental decoder handles for free).
+            sse_framed = None
+            decoder = None
+            parser = None
+            extract = None
+            # No explicit chunk_size: httpx's chunker withholds bytes until
+            # the requested size has accumulated (or the stream ends), which
+            # would hold any answer shorter than the chunk back until the
+            # full generation completed. The default yields whatever each
+            # network read produced, so first-token latency is preserved.
+            async for chunk in response.aiter_bytes():
+                if not chunk:
+                    continue
+                if sse_framed is None:
+                    sse_framed = chunk.lstrip().startswith(b"data:")
+                    if sse_framed:
+                        parser = SSEParser()
+                    else:
+                        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+                if not sse_framed:
+                    piece = decoder.decode(chunk)
+                    if piece:
+                        yield piece
+                    continue
+                for payload in parser.feed(chunk):
+                    if payload == b"[DONE]":
+                        continue
+                    parsed = orjson.loads(payload)
+                    try:
+                        piece = extract(parsed) if extract is not None else None
+                    except (KeyError, TypeError):
+                        piece = None
+                    if piece is None:
+                        extract, piece = _bind_delta_extractor(parsed)
+                    if piece:
+                        yield piece
+
+            if decoder is not None:
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+
+    async def _stream_query(self, api_request: Dict[str, Any]) -> str:
+        """Collect a streamed query into a single string response."""
+        # Accumulate into a list and join once: += on a str inside the
+        # loop re-copies everything accumulated so far for each of the
+        # potentially thousands of deltas in a long answer.
+        parts: List[str] = []
+        async for piece in self.stream_query(api_request):
+            parts.append(piece)
+
+        full_response = "".join(parts)
+        logger.info(f"Collected full response of length: {len(full_response)}")
+        return full_response
+
+
+# The DeepWiki client is shared process-wide so every caller reuses one
+# connection pool. It is created lazily rather than at import time, which
+# keeps importing this module cheap and lets tests swap in their own
+# instance before first use.
+_deepwiki_client: Optional[DeepWikiClient] = None
+
+
+def get_deepwiki_client() -> DeepWikiClient:
+    """Return the shared DeepWikiClient, creating it on first use."""
+    global _deepwiki_client
+    if _deepwiki_client is None:
+        _deepwiki_client = DeepWikiClient()
+    return _deepwiki_client
+
+
+async def close_deepwiki_client() -> None:
+    """Close the shared client, if one was created."""
+    if _deepwiki_client is not None:
+        await _deepwiki_client.close()
@@ -2,19 +2,40 @@
 Main entry point for the DeepWiki MCP Server.
 """
 
-import json
+import asyncio
 import logging
 import os
+import time
 from enum import Enum
-from typing import Dict, List, Optional, Union, Any
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+import orjson
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from mcp.server import FastMCP
 from mcp.server.session import ServerSession
 from pydantic import BaseModel, Field
-import socket
+
+from deepwiki_mcp.client import (
+    DEFAULT_MODEL,
+    DEFAULT_PROVIDER,
+    ChatMessage,
+    CircuitBreakerOpenError,
+    close_deepwiki_client,
+    get_deepwiki_client,
+)
+
+# Make uvloop the event loop policy for every execution path (mcp.run,
+# embedding, tests), not just the uvicorn entry point below that pins
+# loop="uvloop". Everything this server does is asyncio I/O glue, so the
+# libuv loop's cheaper scheduling pays off on each await.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # pragma: no cover - uvloop is in requirements
+    pass
 
 logger = logging.getLogger(__name__)
 
@@ -39,25 +60,27 @@ ServerSession._received_request = patched_received_request
 # Initialize FastAPI app
 app = FastAPI(
     title="DeepWiki MCP Server",
-    description="Multi-Agent Communication Protocol (MCP) server for DeepWiki"
+    description="Multi-Agent Communication Protocol (MCP) server for DeepWiki",
+    # orjson both serializes faster than stdlib json and skips the
+    # jsonable_encoder traversal for plain dict/list payloads.
+    default_response_class=ORJSONResponse,
 )
 
 mcp = FastMCP(name="DeepWikiMCP", log_level="INFO", host="0.0.0.0", port=9783)
 
-# Constants
-# Try to resolve the deepwiki hostname
-try:
-    # Try to resolve the Docker hostname
-    socket.gethostbyname('deepwiki')
-    DEEPWIKI_API_HOST = os.environ.get("DEEPWIKI_API_HOST", "http://deepwiki:9781")
-    logger.info(f"Using Docker hostname: {DEEPWIKI_API_HOST}")
-except socket.gaierror:
-    # Fall back to localhost if hostname resolution fails
-    DEEPWIKI_API_HOST = os.environ.get("DEEPWIKI_API_HOST", "http://localhost:9781")
-    logger.info(f"Using localhost: {DEEPWIKI_API_HOST}")
+# Coalescing window for WebSocket sends: pending deltas are flushed once
+# this many bytes or this much time has accumulated. Token-rate streams
+# otherwise pay JSON encoding + frame + syscall per tiny delta.
+_WS_FLUSH_BYTES = 16 * 1024
+_WS_FLUSH_INTERVAL = 0.02
 
 # --- Pydantic Models ---
 
+# QueryRequest fields forwarded verbatim to DeepWikiClient; messages is
+# handled separately so history keeps its ChatMessage instances.
+_QUERY_FIELDS = frozenset(
+    {"repository", "query", "repo_type", "language", "deep_research", "model", "provider"})
+
 class ResponseFormat(str, Enum):
     """Response format options."""
     JSON = "json"
@@ -65,12 +88,6 @@ class ResponseFormat(str, Enum):
     MARKDOWN = "markdown"
 
 
-class ChatMessage(BaseModel):
-    """Model for a chat message."""
-    role: str = Field(..., description="Role of the message sender, either 'user' or 'assistant'")
-    content: str = Field(..., description="Content of the message")
-
-
 class QueryRequest(BaseModel):
     """Model for a query request to the MCP server."""
     repository: str = Field(...,
@@ -84,8 +101,21 @@ class QueryRequest(BaseModel):
     repo_type: Optional[str] = Field("github", description="Repository type (github, gitlab, etc.)")
 
     # Advanced parameters
-    provider: Optional[str] = Field("google", description="Model provider to use.")
-    model: Optional[str] = Field("gemini-2.5-pro-preview-05-06", description="Model to use with the provider.")
+    provider: Optional[str] = Field(DEFAULT_PROVIDER, description="Model provider to use.")
+    model: Optional[str] = Field(DEFAULT_MODEL, description="Model to use with the provider.")
+
+    def query_kwargs(self) -> Dict[str, Any]:
+        """Dump the client-facing fields as keyword arguments in one pass.
+
+        FastAPI (or model_validate_json on the WebSocket path) has already
+        validated this model, so a single Rust-side model_dump replaces the
+        per-field Python attribute reads each call site used to do. The
+        fields map 1:1 onto DeepWikiClient.query/build_api_request except
+        messages, which is passed through as ``history`` unconverted.
+        """
+        kwargs = self.model_dump(include=_QUERY_FIELDS)
+        kwargs["history"] = self.messages
+        return kwargs
 
 class StreamChunk(BaseModel):
     """Model for a streaming response chunk."""
@@ -93,145 +123,195 @@ class StreamChunk(BaseModel):
     done: bool = Field(False, description="Whether this is the final chunk")
 
 
-class QueryResponse(BaseModel):
-    """Model for a query response."""
-    answer: str = Field(..., description="Answer to the query")
+@app.on_event("startup")
+async def warmup() -> None:
+    """Prewarm DNS resolution and the keepalive connection to the DeepWiki API.
+
+    The first real query then reuses the warm connection instead of paying
+    getaddrinfo plus the TCP+TLS handshake on the request path.
+    """
+    available = await get_deepwiki_client().health_check(force=True)
+    if not available:
+        logger.warning("DeepWiki API is not reachable yet; continuing startup")
 
 
-# --- MCP API Client for DeepWiki ---
+@app.on_event("shutdown")
+async def close_client() -> None:
+    """Close the shared HTTP client so pooled connections shut down cleanly."""
+    await close_deepwiki_client()
 
-class DeepWikiClient:
-    """Client for communicating with the DeepWiki API."""
 
-    def __init__(self, base_url: str = DEEPWIKI_API_HOST):
-        """Initialize the client with the DeepWiki API host."""
-        self.base_url = base_url
-        self.http_client = httpx.AsyncClient(timeout=300.0)
+@app.get("/health", response_model=None)
+async def health_endpoint() -> ORJSONResponse:
+    """Report availability of the upstream DeepWiki API."""
+    healthy = await get_deepwiki_client().health_check()
+    return ORJSONResponse(
+        {"status": "ok" if healthy else "unavailable"},
+        status_code=200 if healthy else 503,
+    )
 
-    async def close(self):
-        """Close the HTTP client."""
-        await self.http_client.aclose()
 
-    async def health_check(self) -> bool:
-        """Check if the DeepWiki API is available."""
-        try:
-            response = await self.http_client.get(f"{self.base_url}/")
-            if response.status_code == 200:
-                return True
-            logger.warning(f"DeepWiki API health check failed with status {response.status_code}")
-            return False
-        except Exception as e:
-            logger.error(f"Error connecting to DeepWiki API: {str(e)}")
-            return False
-
-    async def query(self, request: QueryRequest) -> str:
-        """
-        Query the DeepWiki API for an answer.
+@app.exception_handler(CircuitBreakerOpenError)
+async def breaker_open_handler(request: Request, exc: CircuitBreakerOpenError) -> ORJSONResponse:
+    """Report a tripped circuit breaker as 503 without touching the upstream."""
+    return ORJSONResponse({"error": str(exc)}, status_code=503)
 
-        Args:
-            request: The query request
 
-        Returns:
-            String containing DeepWiki's answer
-        """
+@app.exception_handler(httpx.HTTPError)
+async def upstream_error_handler(request: Request, exc: httpx.HTTPError) -> ORJSONResponse:
+    """Render upstream DeepWiki API failures as a structured 502."""
+    logger.error(f"Upstream DeepWiki API error: {exc!r}")
+    return ORJSONResponse({"error": str(exc)}, status_code=502)
 
-        # Create a simple dict without Pydantic models
-        messages_for_api = [
-            {
-                "role": "user",
-                "content": f"[DEEP RESEARCH] {request.query}" if request.deep_research else f"{request.query}"
-            }
-        ]
-
-        # Prepare the request payload for DeepWiki API using plain dictionaries
-        api_request = {
-            "repo_url": request.repository,
-            "type": request.repo_type,
-            "language": request.language,
-            "messages": messages_for_api,  # This is explicitly List[Dict[str, str]]
-            # Add model and provider from the QueryRequest object
-            "model": request.model,
-            "provider": request.provider
-        }
-
-        logger.info(f"DeepWikiClient: Preparing to send api_request. Structure:")
-        for key, value in api_request.items():
-            value_repr = str(value)[:200] # Truncate long values for logging
-            logger.info(f"  api_request['{key}']: type={type(value)}, value='{value_repr}'")
-            if isinstance(value, list):
-                for i, item in enumerate(value):
-                    item_repr = str(item)[:200]
-                    logger.info(f"    api_request['{key}'][{i}]: type={type(item)}, value='{item_repr}'")
-            elif isinstance(value, dict):
-                 for sub_key, sub_value in value.items():
-                    sub_value_repr = str(sub_value)[:200]
-                    logger.info(f"    api_request['{key}']['{sub_key}']: type={type(sub_value)}, value='{sub_value_repr}'")
-
-        # Make the API request
+
+@app.post("/query", response_model=None)
+async def query_endpoint(request: QueryRequest) -> ORJSONResponse:
+    """Answer a repository question over plain HTTP.
+
+    Builds the response directly rather than returning a model instance,
+    so nothing is re-validated or encoder-traversed on the way out.
+    """
+    answer = await get_deepwiki_client().query(**request.query_kwargs())
+    return ORJSONResponse({"answer": answer})
+
+
+@app.post("/query/stream", response_model=None)
+async def query_stream_endpoint(request: QueryRequest) -> StreamingResponse:
+    """Stream the answer to the caller as it is generated upstream.
+
+    The wrapped generator must stay ``async def``: Starlette offloads sync
+    generators to a thread pool, which is orders of magnitude slower per
+    chunk for token-rate streams.
+    """
+    client = get_deepwiki_client()
+    api_request = client.build_api_request(**request.query_kwargs())
+
+    # Pull the first delta before the response starts: once Starlette has
+    # sent the 200 response start, the breaker_open_handler (503) and
+    # upstream_error_handler (502) can no longer fire, so an unreachable
+    # upstream would look like a successful empty answer. Raising here,
+    # in the handler body, keeps those status codes reachable.
+    deltas = client.stream_query(api_request)
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def event_stream() -> AsyncIterator[str]:
+        if first is not None:
+            yield first
+        async for piece in deltas:
+            yield piece
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop reverse proxies from coalescing chunks; first-token latency
+        # is the whole point of this endpoint.
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+async def _ws_send_chunk(websocket: WebSocket, text: str, done: bool) -> None:
+    """Send one StreamChunk frame, serialized with orjson.
+
+    websocket.send_json would run stdlib json.dumps per frame — thousands
+    of times per answer at token rate. orjson returns the bytes the frame
+    needs directly, so frames go out as binary messages.
+    """
+    await websocket.send_bytes(orjson.dumps({"text": text, "done": done}))
+
+
+@app.websocket("/ws/query")
+async def websocket_query(websocket: WebSocket) -> None:
+    """Stream an answer over a WebSocket connection.
+
+    Frames are binary, orjson-encoded, and follow the StreamChunk shape
+    {"text": ..., "done": ...}. Each
+    delta is forwarded as soon as it arrives and never accumulated
+    server-side, so per-connection memory stays bounded by the chunk size
+    rather than the answer size.
+    """
+    await websocket.accept()
+    try:
+        # Feed the raw frame straight into pydantic-core's JSON parser:
+        # one Rust-side pass instead of decode + orjson.loads + dict
+        # re-validation. Clients may send either a text or a binary frame.
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            # Client went away before sending a request; nothing to answer
+            # and nothing worth logging beyond debug.
+            logger.debug("WebSocket client disconnected before sending a request")
+            return
+        raw = message.get("bytes") or message.get("text") or b"{}"
+        request = QueryRequest.model_validate_json(raw)
+        client = get_deepwiki_client()
+        api_request = client.build_api_request(**request.query_kwargs())
+
+        pending: List[str] = []
+        pending_size = 0
+        last_flush = time.monotonic()
+        deltas = client.stream_query(api_request).__aiter__()
+        next_delta: Optional[asyncio.Task] = None
         try:
-            return await self._stream_query(api_request)
-        except Exception as e:
-            error_msg = f"Error querying DeepWiki API: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
-
-    async def _stream_query(self, api_request: Dict[str, Any]) -> str:
-        """Process a streaming query to the DeepWiki API and collect the full response."""
+            while True:
+                if next_delta is None:
+                    next_delta = asyncio.ensure_future(deltas.__anext__())
+                # With nothing buffered, wait for the next delta as long as
+                # it takes; otherwise wait only until the flush window
+                # closes. asyncio.wait leaves the step running on timeout
+                # (wait_for would cancel it, killing the upstream stream),
+                # so a mid-generation stall flushes what's pending within
+                # the window instead of holding it until the next delta.
+                timeout = None
+                if pending:
+                    timeout = max(0.0, _WS_FLUSH_INTERVAL - (time.monotonic() - last_flush))
+                done, _ = await asyncio.wait({next_delta}, timeout=timeout)
+                if not done:
+                    await _ws_send_chunk(websocket, "".join(pending), False)
+                    pending.clear()
+                    pending_size = 0
+                    last_flush = time.monotonic()
+                    continue
+                task, next_delta = next_delta, None
+                try:
+                    piece = task.result()
+                except StopAsyncIteration:
+                    break
+                pending.append(piece)
+                pending_size += len(piece)
+                if pending_size >= _WS_FLUSH_BYTES:
+                    await _ws_send_chunk(websocket, "".join(pending), False)
+                    pending.clear()
+                    pending_size = 0
+                    last_flush = time.monotonic()
+        finally:
+            # On an abnormal exit (send failure, disconnect) shut the
+            # upstream stream down instead of leaving it to GC; cancelling
+            # the in-flight step unwinds the generator itself.
+            if next_delta is not None:
+                next_delta.cancel()
+                next_delta.add_done_callback(
+                    lambda t: t.cancelled() or t.exception())
+            else:
+                await deltas.aclose()
+        if pending:
+            await _ws_send_chunk(websocket, "".join(pending), False)
+        await _ws_send_chunk(websocket, "", True)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.debug("WebSocket client disconnected mid-stream")
+    # ValueError covers pydantic's ValidationError on a bad request frame;
+    # anything else is a programming error and should propagate loudly.
+    except (httpx.HTTPError, asyncio.TimeoutError, CircuitBreakerOpenError, ValueError) as e:
+        logger.error("WebSocket query failed: %r", e)
         try:
-            api_url = f"{self.base_url}/chat/completions/stream"
-            headers = {"Content-Type": "application/json"}
-
-            # Use the HTTP client to make a streaming request and collect all chunks
-            full_response = ""
-            async with self.http_client.stream("POST", api_url, json=api_request, headers=headers) as response:
-                async for chunk in response.aiter_text():
-                    if chunk:
-                        # Some APIs send data in JSON format even in streams
-                        try:
-                            # Try to parse as JSON
-                            parsed = json.loads(chunk)
-                            if 'text' in parsed:
-                                full_response += parsed['text']
-                            elif 'content' in parsed:
-                                full_response += parsed['content']
-                            elif 'delta' in parsed and 'content' in parsed['delta']:
-                                full_response += parsed['delta']['content']
-                            else:
-                                full_response += str(parsed)
-                        except json.JSONDecodeError:
-                            # Just append as raw text
-                            full_response += chunk
-
-            logger.info(f"Collected full response of length: {len(full_response)}")
-            return full_response
-        except Exception as e:
-            error_msg = f"Error streaming response from DeepWiki API: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
-
-    async def _direct_query(self, api_request: Dict[str, Any]) -> QueryResponse:
-        """Process a direct (non-streaming) query to the DeepWiki API."""
-        api_url = f"{self.base_url}/chat/completions/stream"
-        headers = {"Content-Type": "application/json"}
-
-        # For direct queries, we still need to handle streaming responses from the API
-        response_text = ""
-
-        async with self.http_client.stream("POST", api_url, json=api_request, headers=headers) as response:
-            async for chunk in response.aiter_text():
-                if chunk:
-                    response_text += chunk
-
-        # Parse out any context information if available
-        # This is a simplification - context info might not be available in this format
-
-        return QueryResponse(
-            answer=response_text
-        )
-
-
-# Initialize DeepWiki API client
-deepwiki_client = DeepWikiClient()
+            # Send the exception type only: stringifying an httpx error can
+            # materialize a very large upstream body into the frame.
+            await _ws_send_chunk(websocket, f"Error: {type(e).__name__}", True)
+            await websocket.close()
+        except (WebSocketDisconnect, RuntimeError):
+            pass
 
 
 @mcp.tool(
@@ -268,25 +348,33 @@ async def ask_deepwiki(
     """
     logger.info(f"DeepWiki query for repository: {repository}, provider: {provider}, model: {model}")
 
-    # Prepare arguments for QueryRequest, allowing Pydantic defaults to take effect if model/provider are None
-    query_request_args = {
-        "repository": repository,
-        "query": query,
-        "repo_type": repo_type,
-        "language": language,
-        "deep_research": deep_research,
-    }
-    if model is not None:
-        query_request_args["model"] = model
-    if provider is not None:
-        query_request_args["provider"] = provider
-
-    request_obj = QueryRequest(**query_request_args)
-
     # Query the DeepWiki API
-    response = await deepwiki_client.query(request_obj)
+    response = await get_deepwiki_client().query(
+        repository=repository,
+        query=query,
+        repo_type=repo_type,
+        language=language,
+        deep_research=deep_research,
+        model=model,
+        provider=provider,
+    )
     return response
 
 
 if __name__ == "__main__":
-    mcp.run(transport="sse")
+    # Mount the MCP SSE transport on the FastAPI app (after its own routes,
+    # so they keep precedence) and serve both through a single uvicorn
+    # instance. Running the FastAPI app rather than mcp.run() means the
+    # startup/shutdown events above actually fire.
+    app.mount("/", mcp.sse_app())
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.environ.get("MCP_PORT", "9783")),
+        # uvloop + httptools roughly double uvicorn's raw throughput, and
+        # the access log costs a format + write per request — SSE streaming
+        # makes both per-chunk costs, not just per-request.
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+    )